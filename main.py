@@ -1,6 +1,7 @@
+import functools
 import io
 import os
-from typing import Optional, Tuple, List
+from typing import Dict, Optional, Tuple, List
 
 import PyPDF2
 from reportlab.lib.pagesizes import A4, A3, A2, A1, A0, landscape
@@ -9,11 +10,25 @@ from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfgen import canvas
 
+try:
+    import pymupdf as fitz
+except ImportError:  # 未安装PyMuPDF时退回PyPDF2 + reportlab的叠加方案
+    fitz = None
+
 # 全局默认值
 DEFAULT_MARGINS = (2.5, 2.5, 2.5, 3.0)
 DEFAULT_FOOTER_HEIGHT = 1.75
 DEFAULT_START_PAGE_NUMBER = 1
 
+# 宋体文件的默认路径，非Windows系统下在程序所在目录查找
+if os.name == 'nt':
+    DEFAULT_FONT_PATH = os.path.join(os.environ.get('WINDIR', 'C:\\Windows'), 'FONTS', 'SIMSUN.TTC')
+else:
+    DEFAULT_FONT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'SIMSUN.TTC')
+
+# 已注册到reportlab的宋体文件路径，避免重复解析字体文件
+_REGISTERED_FONT_PATH: Optional[str] = None
+
 
 def print_welcome():
     print("欢迎使用PDF页码添加工具！")
@@ -37,14 +52,15 @@ def get_page_size() -> Tuple[float, float]:
 def get_page_number_position() -> str:
     position_input = input(
         "请选择页码放置的位置（top, bottom, left, right, auto），默认为auto (回车即使用默认参数)：").lower()
-    if position_input not in ['top', 'bottom', 'left', 'right', 'auto']:
+    if position_input not in PAGE_NUMBER_POSITIONS:
         return 'auto'
     return position_input
 
 
 def scan_pdf_files(directory: str = '.') -> List[str]:
     """扫描指定目录下的PDF文件"""
-    return [f for f in os.listdir(directory) if f.lower().endswith('.pdf')]
+    with os.scandir(directory) as entries:
+        return [entry.name for entry in entries if entry.name.lower().endswith('.pdf') and entry.is_file()]
 
 
 def select_pdf_file(pdf_files: List[str], directory: str = '.') -> Optional[str]:
@@ -97,75 +113,123 @@ def get_user_input() -> Tuple[Tuple[float, float, float, float], float, int]:
     return margins, footer_height, start_page_number
 
 
-def create_page_number_pdf(num_pages: int, pdf_path: str, margins: Tuple[float, float, float, float],
+@functools.lru_cache(1)
+def _resolve_simsun_path() -> str:
+    """返回默认宋体文件路径，并检查文件是否存在"""
+    assert os.path.exists(DEFAULT_FONT_PATH), "未找到宋体文件，请检查系统字库安装情况"
+    return DEFAULT_FONT_PATH
+
+
+def _horizontal_center(page_size: Tuple[float, float], margins: Tuple[float, float, float, float]) -> float:
+    """返回左右页边距之间的水平中点"""
+    return (page_size[0] - margins[3] * cm - margins[1] * cm) / 2 + margins[3] * cm
+
+
+def _vertical_center(page_size: Tuple[float, float], margins: Tuple[float, float, float, float]) -> float:
+    """返回上下页边距之间的垂直中点"""
+    return (page_size[1] - margins[0] * cm - margins[2] * cm) / 2 + margins[0] * cm
+
+
+# 各页码位置对应的计算方式：(页面尺寸, 页边距, 页脚高度) -> (x, y, 旋转角度)，以及是否需要水平居中
+PAGE_NUMBER_POSITIONS = {
+    'top': (lambda size, margins, footer: (_horizontal_center(size, margins), size[1] - footer * cm, 0), True),
+    'bottom': (lambda size, margins, footer: (_horizontal_center(size, margins), footer * cm, 0), True),
+    'left': (lambda size, margins, footer: (footer * cm, _vertical_center(size, margins), 270), False),
+    'right': (lambda size, margins, footer: (size[0] - footer * cm, _vertical_center(size, margins), 90), False),
+    'auto': (lambda size, margins, footer: (_horizontal_center(size, margins), footer * cm, 0), True),
+}
+
+# 页码旋转角度对应的变换矩阵系数(cos, sin, -sin, cos)，避免每页重复计算三角函数
+ROTATION_MATRICES = {
+    0: (1, 0, 0, 1),
+    90: (0, 1, -1, 0),
+    180: (-1, 0, 0, -1),
+    270: (0, -1, 1, 0),
+}
+
+
+def _page_number_layout(page_size: Tuple[float, float], margins: Tuple[float, float, float, float],
+                        footer_height: float, position: str) -> Tuple[float, float, int, bool]:
+    """
+    计算给定页面尺寸下页码的位置。
+
+    参数:
+    page_size (Tuple[float, float]): 页面尺寸。
+    margins (Tuple[float, float, float, float]): 页边距（上, 右, 下, 左），以厘米为单位。
+    footer_height (float): 页脚高度，以厘米为单位。
+    position (str): 页码放置的位置。
+
+    返回:
+    Tuple[float, float, int, bool]: 页码坐标x、y（左下角为原点）、文字旋转角度以及是否需要水平居中。
+    """
+    layout, centered = PAGE_NUMBER_POSITIONS.get(position, PAGE_NUMBER_POSITIONS['auto'])
+    x_position, y_position, text_angle = layout(page_size, margins, footer_height)
+
+    # 手动补偿页码位置(奇怪的对不齐)
+    x_position += 0.05 * cm
+    y_position += 0.15 * cm
+
+    return x_position, y_position, text_angle, centered
+
+
+def create_page_number_pdf(orientations: List[Tuple[float, float]], margins: Tuple[float, float, float, float],
                            footer_height: float, start_page_number: int, page_size: Tuple[float, float],
                            position: str, font_path: Optional[str] = None, font_size: float = 10.5) -> io.BytesIO:
     packet = io.BytesIO()
-    c = canvas.Canvas(packet, pagesize=page_size)
+    # 页码PDF只是合并用的中间数据，不压缩页面内容，省去reportlab压缩和PyPDF2合并时的解压
+    c = canvas.Canvas(packet, pagesize=page_size, pageCompression=0)
 
     # 注册系统中的宋体字体
+    global _REGISTERED_FONT_PATH
     if font_path is None:
-        font_path = os.path.join(os.getenv('WINDIR'), 'FONTS', 'SIMSUN.TTC')
-        assert os.path.exists(font_path), "未找到宋体文件，请检查系统字库安装情况"
-    pdfmetrics.registerFont(TTFont('SimSun', font_path))
-
-    # 打开现有的PDF文件以检测页面方向
-    reader = PyPDF2.PdfReader(pdf_path)
-
-    for i in range(num_pages):
-        page = reader.pages[i]
-        width, height = page.mediabox.upper_right
-
+        font_path = _resolve_simsun_path()
+    if _REGISTERED_FONT_PATH != font_path:
+        pdfmetrics.registerFont(TTFont('SimSun', font_path))
+        _REGISTERED_FONT_PATH = font_path
+
+    # 页码位置只与页面方向有关，按竖版/横版各计算一次
+    portrait_size = page_size
+    landscape_size = landscape(page_size)
+    portrait_layout = _page_number_layout(portrait_size, margins, footer_height, position)
+    landscape_layout = _page_number_layout(landscape_size, margins, footer_height, position)
+
+    # 页码只包含数字和负号，预先缓存每个字符的宽度
+    char_widths: Dict[str, float] = {char: c.stringWidth(char, 'SimSun', font_size) for char in '-0123456789'}
+
+    # 画布初始尺寸即为竖版尺寸；所有页面均为横版时预先设置一次，循环中仅在页面方向变化时才重新设置
+    last_page_size = portrait_size
+    if orientations and all(width > height for width, height in orientations):
+        c.setPageSize(landscape_size)
+        last_page_size = landscape_size
+
+    for i, (width, height) in enumerate(orientations):
         if width > height:  # 横板页面
-            current_page_size = landscape(page_size)
+            current_page_size = landscape_size
+            x_position, y_position, text_angle, centered = landscape_layout
         else:  # 竖板页面
-            current_page_size = page_size
+            current_page_size = portrait_size
+            x_position, y_position, text_angle, centered = portrait_layout
 
-        c.setPageSize(current_page_size)
+        if current_page_size is not last_page_size:
+            c.setPageSize(current_page_size)
+            last_page_size = current_page_size
 
         # 计算页码
-        page_number = start_page_number + i
-
-        # 根据用户选择的位置计算页码的位置
-        if position == 'top':
-            x_position = (current_page_size[0] - margins[3] * cm - margins[1] * cm) / 2 + margins[3] * cm
-            y_position = current_page_size[1] - footer_height * cm
-            text_angle = 0
-        elif position == 'bottom':
-            x_position = (current_page_size[0] - margins[3] * cm - margins[1] * cm) / 2 + margins[3] * cm
-            y_position = footer_height * cm
-            text_angle = 0
-        elif position == 'left':
-            x_position = footer_height * cm
-            y_position = (current_page_size[1] - margins[0] * cm - margins[2] * cm) / 2 + margins[0] * cm
-            text_angle = 270
-        elif position == 'right':
-            x_position = current_page_size[0] - footer_height * cm
-            y_position = (current_page_size[1] - margins[0] * cm - margins[2] * cm) / 2 + margins[0] * cm
-            text_angle = 90
-        else:  # auto
-            x_position = (current_page_size[0] - margins[3] * cm - margins[1] * cm) / 2 + margins[3] * cm
-            y_position = footer_height * cm
-            text_angle = 0
-
-        # 手动补偿页码位置(奇怪的对不齐)
-        x_position += 0.05 * cm
-        y_position += 0.15 * cm
-
-        # 计算文字宽度
-        text_width = c.stringWidth(str(page_number), 'SimSun', font_size)
+        page_number = str(start_page_number + i)
 
         # 对于顶部和底部位置，调整x坐标以使文字居中
-        if position in ['top', 'bottom', 'auto']:
-            x_position -= text_width / 2
+        if centered:
+            x_position -= sum(char_widths[char] for char in page_number) / 2
 
-        # 绘制页码
+        # 绘制页码（showPage会重置字体状态，每页都需重新设置）
         c.setFont('SimSun', font_size)
-        c.saveState()
-        c.translate(x_position, y_position)
-        c.rotate(text_angle)
-        c.drawString(0, 0, str(page_number))
-        c.restoreState()
+        if text_angle:
+            c.saveState()
+            c.transform(*ROTATION_MATRICES[text_angle], x_position, y_position)
+            c.drawString(0, 0, page_number)
+            c.restoreState()
+        else:  # 无需旋转时直接绘制，省去图形状态的保存与恢复
+            c.drawString(x_position, y_position, page_number)
         c.showPage()
 
     c.save()
@@ -174,31 +238,97 @@ def create_page_number_pdf(num_pages: int, pdf_path: str, margins: Tuple[float,
 
 
 def add_page_numbers(pdf_path: str, output_path: str, margins: Tuple[float, float, float, float], footer_height: float,
-                     start_page_number: int, page_size: Tuple[float, float], position: str) -> str:
-    # 打开现有的PDF文件
-    reader = PyPDF2.PdfReader(pdf_path)
-    writer = PyPDF2.PdfWriter()
-    num_pages = len(reader.pages)
+                     start_page_number: int, page_size: Tuple[float, float], position: str,
+                     font_path: Optional[str] = None, font_size: float = 10.5) -> str:
+    if fitz is None:
+        return _add_page_numbers_pypdf(pdf_path, output_path, margins, footer_height, start_page_number, page_size,
+                                       position, font_path, font_size)
+
+    # 字体只加载一次，所有页面共用同一份嵌入字体
+    if font_path is None:
+        font_path = _resolve_simsun_path()
+    font = fitz.Font(fontfile=font_path)
+
+    # 页码只包含数字和负号，预先缓存每个字符的宽度
+    char_widths: Dict[str, float] = {char: font.text_length(char, fontsize=font_size) for char in '-0123456789'}
+
+    # 页码位置只与页面方向有关，按竖版/横版各计算一次
+    layouts = {
+        False: _page_number_layout(page_size, margins, footer_height, position),
+        True: _page_number_layout(landscape(page_size), margins, footer_height, position),
+    }
+
+    # 打开现有的PDF文件，直接在原始页面上写入页码；修改就地进行，不会额外复制页面树
+    # 先读入内存再打开，输出路径与输入路径相同时也能直接覆盖保存
+    with open(pdf_path, "rb") as input_pdf:
+        pdf_data = input_pdf.read()
+    with fitz.open(stream=pdf_data, filetype='pdf') as doc:
+        for i, page in enumerate(doc):
+            mediabox = page.mediabox
+            x_position, y_position, text_angle, centered = layouts[mediabox.width > mediabox.height]
+
+            # 计算页码
+            page_number = str(start_page_number + i)
+
+            # 对于顶部和底部位置，调整x坐标以使文字居中
+            if centered:
+                x_position -= sum(char_widths[char] for char in page_number) / 2
+
+            # TextWriter在带裁剪框的页面上纵向偏移计算有误，写入期间暂时令裁剪框与MediaBox一致
+            cropped = page.cropbox != page.mediabox
+            if cropped:
+                crop_box = doc.xref_get_key(page.xref, 'CropBox')[1]
+                doc.xref_set_key(page.xref, 'CropBox', '[%g %g %g %g]' % tuple(mediabox))
+
+            # 页码坐标基于PDF坐标系，需转换为PyMuPDF的页面坐标
+            origin = fitz.Point(x_position, y_position) * page.transformation_matrix
+            text_writer = fitz.TextWriter(page.rect)
+            text_writer.append(origin, page_number, font=font, fontsize=font_size)
+            text_writer.write_text(page, morph=(origin, fitz.Matrix(text_angle)) if text_angle else None)
+
+            # 恢复原有裁剪框，原本继承自上级节点时（null）即删除该键
+            if cropped:
+                doc.xref_set_key(page.xref, 'CropBox', crop_box)
+
+        # 只保留实际用到的字形，避免整个宋体文件被嵌入输出文件
+        doc.subset_fonts()
+
+        # 保存修改后的PDF文件
+        doc.save(output_path, deflate=True, garbage=3)
 
-    # 创建页码PDF文件
-    packet = create_page_number_pdf(num_pages, pdf_path, margins, footer_height, start_page_number, page_size, position)
-    temp_reader = PyPDF2.PdfReader(packet)
+    return output_path
+
+
+def _add_page_numbers_pypdf(pdf_path: str, output_path: str, margins: Tuple[float, float, float, float],
+                            footer_height: float, start_page_number: int, page_size: Tuple[float, float],
+                            position: str, font_path: Optional[str] = None, font_size: float = 10.5) -> str:
+    """未安装PyMuPDF时使用的旧方案：先用reportlab生成页码PDF，再逐页合并到原始页面上。"""
+    # 打开现有的PDF文件，只读取一次
+    with open(pdf_path, "rb") as input_pdf:
+        pdf_data = input_pdf.read()
+    reader = PyPDF2.PdfReader(io.BytesIO(pdf_data))
+    writer = PyPDF2.PdfWriter()
 
-    for i in range(num_pages):
-        # 获取原始PDF页面
-        page = reader.pages[i]
+    # 一次性读取各页尺寸以检测页面方向，避免再次解析原始PDF
+    orientations = [(float(page.mediabox.width), float(page.mediabox.height)) for page in reader.pages]
 
-        # 获取临时PDF页面（页码）
-        overlay = temp_reader.pages[i]
+    # 创建页码PDF文件，合并完成后立即释放，不与输出文件同时驻留内存
+    # 每页的页码文字各不相同，无法通过平移复用同一个页码页面，因此每页对应一个页码页面
+    with create_page_number_pdf(orientations, margins, footer_height, start_page_number, page_size, position,
+                                font_path, font_size) as packet:
+        temp_reader = PyPDF2.PdfReader(packet)
 
-        # 将页码页面合并到原始页面上
-        page.merge_page(overlay)
+        for page, overlay in zip(reader.pages, temp_reader.pages):
+            # 将页码页面合并到原始页面上
+            page.merge_page(overlay)
 
-        # 将合并后的页面添加到新的PDF写入器
-        writer.add_page(page)
+        # 追加合并后的文档，同时保留原有书签与文档信息
+        writer.append(reader)
+        if reader.metadata:
+            writer.add_metadata(reader.metadata)
 
-    # 保存修改后的PDF文件
-    with open(output_path, "wb") as output_pdf:
+    # 保存修改后的PDF文件，使用1MB写缓冲减少大文件的系统调用次数
+    with open(output_path, "wb", buffering=1 << 20) as output_pdf:
         writer.write(output_pdf)
 
     return output_path
@@ -0,0 +1,108 @@
+import os
+import sys
+
+import pytest
+import reportlab
+from reportlab.lib.pagesizes import A4
+
+fitz = pytest.importorskip('pymupdf')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main  # noqa: E402
+
+# reportlab自带的TrueType字体，代替系统宋体
+FONT_PATH = os.path.join(os.path.dirname(reportlab.__file__), 'fonts', 'Vera.ttf')
+
+
+@pytest.fixture
+def input_pdf(tmp_path) -> str:
+    """生成包含竖版、横版、带裁剪框以及旋转页面的测试PDF"""
+    doc = fitz.open()
+    for width, height in [(595, 842), (842, 595), (595, 842), (595, 842), (595, 842)]:
+        doc.new_page(width=width, height=height)
+    doc.xref_set_key(doc[2].xref, 'CropBox', '[30 20 565 810]')
+    doc[3].set_rotation(90)
+    doc.xref_set_key(doc[4].xref, 'CropBox', '[30 20 565 810]')
+    doc[4].set_rotation(270)
+
+    path = str(tmp_path / 'input.pdf')
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def extract_page_numbers(pdf_path: str) -> list:
+    """提取每页页码的文字、基线起点与书写方向"""
+    result = []
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            result.append([(span['text'], span['origin'], line['dir'])
+                           for block in page.get_text('dict', clip=page.mediabox)['blocks']
+                           for line in block['lines'] for span in line['spans']])
+    return result
+
+
+@pytest.mark.parametrize('position', ['top', 'bottom', 'left', 'right', 'auto'])
+def test_pymupdf_matches_pypdf_fallback(tmp_path, input_pdf, position):
+    args = (main.DEFAULT_MARGINS, main.DEFAULT_FOOTER_HEIGHT, 1, A4, position, FONT_PATH)
+    fitz_output = main.add_page_numbers(input_pdf, str(tmp_path / 'fitz.pdf'), *args)
+    pypdf_output = main._add_page_numbers_pypdf(input_pdf, str(tmp_path / 'pypdf.pdf'), *args)
+
+    expected = extract_page_numbers(pypdf_output)
+    actual = extract_page_numbers(fitz_output)
+    assert len(actual) == len(expected)
+    for actual_spans, expected_spans in zip(actual, expected):
+        assert len(actual_spans) == len(expected_spans)
+        for (text, origin, direction), (expected_text, expected_origin, expected_direction) in zip(
+                actual_spans, expected_spans):
+            assert text == expected_text
+            assert origin == pytest.approx(expected_origin, abs=0.5)
+            assert direction == pytest.approx(expected_direction, abs=1e-3)
+
+
+def test_pymupdf_keeps_crop_box(tmp_path, input_pdf):
+    output = main.add_page_numbers(input_pdf, str(tmp_path / 'fitz.pdf'), main.DEFAULT_MARGINS,
+                                   main.DEFAULT_FOOTER_HEIGHT, 1, A4, 'top', FONT_PATH)
+    with fitz.open(input_pdf) as original, fitz.open(output) as stamped:
+        for original_page, stamped_page in zip(original, stamped):
+            assert stamped_page.cropbox == original_page.cropbox
+
+
+@pytest.mark.parametrize('add_page_numbers', [main.add_page_numbers, main._add_page_numbers_pypdf])
+def test_keeps_outline_and_metadata(tmp_path, add_page_numbers):
+    doc = fitz.open()
+    for _ in range(3):
+        doc.new_page()
+    doc.set_toc([[1, 'A', 1], [1, 'B', 3]])
+    doc.set_metadata({'title': 'Title', 'author': 'Author'})
+    input_pdf = str(tmp_path / 'input.pdf')
+    doc.save(input_pdf)
+    doc.close()
+
+    output = add_page_numbers(input_pdf, str(tmp_path / 'output.pdf'), main.DEFAULT_MARGINS,
+                              main.DEFAULT_FOOTER_HEIGHT, 1, A4, 'bottom', FONT_PATH)
+    with fitz.open(output) as stamped:
+        assert stamped.get_toc() == [[1, 'A', 1], [1, 'B', 3]]
+        assert stamped.metadata['title'] == 'Title'
+        assert stamped.metadata['author'] == 'Author'
+
+
+def test_pymupdf_subsets_embedded_font(tmp_path, input_pdf):
+    output = main.add_page_numbers(input_pdf, str(tmp_path / 'fitz.pdf'), main.DEFAULT_MARGINS,
+                                   main.DEFAULT_FOOTER_HEIGHT, 1, A4, 'bottom', FONT_PATH)
+    font_size = os.path.getsize(FONT_PATH)
+    with fitz.open(output) as stamped:
+        font_files = [int(stamped.xref_get_key(xref, 'Length1')[1]) for xref in range(1, stamped.xref_length())
+                      if stamped.xref_get_key(xref, 'Length1')[0] == 'int']
+    assert font_files
+    assert all(length < font_size / 2 for length in font_files)
+
+
+@pytest.mark.parametrize('add_page_numbers', [main.add_page_numbers, main._add_page_numbers_pypdf])
+def test_overwrites_input_file(tmp_path, input_pdf, add_page_numbers):
+    expected = extract_page_numbers(add_page_numbers(input_pdf, str(tmp_path / 'output.pdf'), main.DEFAULT_MARGINS,
+                                                     main.DEFAULT_FOOTER_HEIGHT, 1, A4, 'bottom', FONT_PATH))
+    output = add_page_numbers(input_pdf, input_pdf, main.DEFAULT_MARGINS, main.DEFAULT_FOOTER_HEIGHT, 1, A4, 'bottom',
+                              FONT_PATH)
+    assert output == input_pdf
+    assert extract_page_numbers(output) == expected